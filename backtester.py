@@ -1,52 +1,334 @@
+import pickle
+
+import numpy as np
 import pandas as pd
 
+from strategies.array_strategy import ArrayStrategy, LegacyStrategyAdapter, column_arrays
+
+# Maximum absolute deviation of compact-mode metrics from the float64 results.
+# Prices are widened back to float64 before computing, so money and percentage
+# metrics should match to rounding and counts exactly.
+COMPACT_TOLERANCES = {
+    '最终资产': 0.01,
+    '总收益率(%)': 0.01,
+    '交易次数': 0,
+    '盈利交易次数': 0,
+    '总交易对': 0,
+    '胜率(%)': 0.01,
+    '最大回撤(%)': 0.01
+}
+
+
+def compare_metrics(reference, candidate, tolerances=COMPACT_TOLERANCES):
+    """
+    Compare backtesting metrics against reference results.
+    
+    Args:
+        reference (dict): Metrics from get_metrics of the float64 backtest
+        candidate (dict): Metrics from get_metrics of the compact backtest
+        tolerances (dict): Maximum absolute deviation allowed per metric
+    
+    Returns:
+        dict: (reference, candidate) values of each metric outside its tolerance,
+            empty when all metrics are within tolerance
+    """
+    return {
+        key: (reference[key], candidate[key])
+        for key, tolerance in tolerances.items()
+        if abs(reference[key] - candidate[key]) > tolerance
+    }
+
+
+def calculate_metrics(results, initial_capital, fills=None):
+    """
+    Calculate backtesting metrics from backtest results.
+    
+    Args:
+        results (pd.DataFrame): Results with '收盘', '信号' and '资产价值' columns
+        initial_capital (float): Capital the backtest started with
+        fills (pd.DataFrame, optional): Fills of an execution engine with 'side' and
+            'price' columns. When given, trades are counted and paired from the fills
+            at their fill prices instead of from the signals at the close
+    
+    Returns:
+        dict: Dictionary containing various backtesting metrics
+    """
+    if fills is not None:
+        # Each fill is one trade; a buy fill is paired with the next sell fill
+        trade_count = len(fills)
+        buy_prices, sell_prices = [], []
+        entry = None
+        for side, price in zip(fills['side'], fills['price']):
+            if side == 1 and entry is None:
+                entry = price
+            elif side == -1 and entry is not None:
+                buy_prices.append(entry)
+                sell_prices.append(price)
+                entry = None
+        buy_prices = np.array(buy_prices, dtype=np.float64)
+        sell_prices = np.array(sell_prices, dtype=np.float64)
+        min_pairs = len(buy_prices)
+    else:
+        signals = results['信号'].to_numpy()
+        close = results['收盘'].to_numpy()
+
+        # Number of trades (buys + sells, each complete trade counts as 2 signals).
+        # NaN warm-up rows of legacy strategies are holds, as in compact int8 signals
+        total_signals = int(((signals == 1) | (signals == -1)).sum())
+        trade_count = total_signals  # Each buy/sell is counted as one trade
+
+        # Win rate: profitable trades / total trades (requires paired buy-sell signals)
+        buy_prices = close[signals == 1]
+        sell_prices = close[signals == -1]
+
+        # Pair buy and sell signals (take the smaller count)
+        min_pairs = min(len(buy_prices), len(sell_prices))
+        buy_prices = buy_prices[:min_pairs]
+        sell_prices = sell_prices[:min_pairs]
+    profits = (sell_prices - buy_prices) / buy_prices
+
+    winning_trades = int((profits > 0).sum())
+    win_rate = (winning_trades / min_pairs) * 100 if min_pairs > 0 else 0
+
+    # Total return
+    final_value = results['资产价值'].iloc[-1]
+    total_return = ((final_value - initial_capital) / initial_capital) * 100
+
+    # Maximum drawdown: maximum decline in asset value from peak to trough
+    rolling_max = results['资产价值'].cummax()
+    daily_drawdown = (results['资产价值'] - rolling_max) / rolling_max
+    max_drawdown = (daily_drawdown.min() * 100) if len(daily_drawdown) > 0 else 0
+
+    return {
+        '初始资金': initial_capital,
+        '最终资产': final_value,
+        '总收益率(%)': round(total_return, 2),
+        '交易次数': trade_count,
+        '盈利交易次数': winning_trades,
+        '总交易对': min_pairs,
+        '胜率(%)': round(win_rate, 2),
+        '最大回撤(%)': round(max_drawdown, 2)
+    }
+
+
+def simulate_signals(signals, prices, initial_capital):
+    """
+    Backtest several signal sets on the same prices in one vectorized pass.
+    
+    Applies the same rules as Backtester with market orders at the close
+    (buy with all cash on 1, sell all shares on -1), with one column per
+    signal set. Holdings only change on bars where some signal set trades,
+    so only those bars are visited and the rest are filled forward.
+    
+    Args:
+        signals (np.ndarray): Signals of shape (bars, signal sets)
+        prices (np.ndarray): Closing prices of shape (bars,)
+        initial_capital (np.ndarray or float): Initial capital per signal set
+    
+    Returns:
+        tuple: (positions, cash, asset values) arrays of shape (bars, signal sets)
+    """
+    n, k = signals.shape
+    cash = np.broadcast_to(np.asarray(initial_capital, dtype=np.float64), (k,)).copy()
+    shares = np.zeros(k, dtype=np.int64)
+    positions = np.zeros((n, k), dtype=np.int64)
+    cash_values = np.empty((n, k), dtype=np.float64)
+    cash_values[:] = cash
+
+    active = np.flatnonzero(((signals == 1) | (signals == -1)).any(axis=1))
+    for j, i in enumerate(active):
+        price = float(prices[i])
+        buy = (signals[i] == 1) & (cash > 0)
+        shares_to_buy = np.where(buy, np.floor(cash / price), 0).astype(np.int64)
+        cash = cash - shares_to_buy * price
+        sell = (signals[i] == -1) & (shares > 0)
+        cash = np.where(sell, cash + shares * price, cash)
+        shares = np.where(sell, 0, shares + shares_to_buy)
+        # Holdings stay the same until the next active bar
+        end = active[j + 1] if j + 1 < len(active) else n
+        positions[i:end] = shares
+        cash_values[i:end] = cash
+
+    asset_values = cash_values + positions * np.asarray(prices, dtype=np.float64)[:, None]
+    return positions, cash_values, asset_values
+
+
+def save_checkpoint(path, checkpoint):
+    """
+    Save a backtest checkpoint to a file.
+    
+    Args:
+        path (str): Checkpoint file
+        checkpoint (dict): Checkpoint from Backtester.checkpoint
+    """
+    with open(path, 'wb') as f:
+        pickle.dump(checkpoint, f)
+
+
+def load_checkpoint(path):
+    """
+    Load a backtest checkpoint saved by save_checkpoint.
+    
+    Args:
+        path (str): Checkpoint file
+    
+    Returns:
+        dict: Checkpoint to pass to Backtester.run
+    """
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
 
 class Backtester:
     """Class for backtesting trading strategies."""
     
-    def __init__(self, data, strategy, initial_capital=100000):
+    def __init__(self, data, strategy, initial_capital=100000, compact=False, verbose=True,
+                 execution=None):
         """
         Initialize the Backtester.
         
+        The price data is shared, not copied: results reference the same
+        price columns and only add the backtest columns.
+        
         Args:
             data (pd.DataFrame): Historical price data
-            strategy (TradingStrategy): Trading strategy to backtest
+            strategy (ArrayStrategy or TradingStrategy): Trading strategy to backtest,
+                legacy TradingStrategy instances are wrapped in LegacyStrategyAdapter
             initial_capital (float): Initial capital for backtesting
+            compact (bool): Store signals as int8 and share counts as int64 instead
+                of float64; rows without a signal become hold (0)
+            verbose (bool): Print each executed trade
+            execution (ExecutionEngine, optional): Engine filling orders against the
+                '开盘'/'高'/'低'/'收盘' columns; by default every signal is filled
+                as a market order at the close
         """
-        self.data = data.copy()
+        self.data = data
+        if not isinstance(strategy, ArrayStrategy):
+            strategy = LegacyStrategyAdapter(strategy, data.index)
         self.strategy = strategy
         self.initial_capital = initial_capital
+        self.compact = compact
+        self.verbose = verbose
+        self.execution = execution
         self.positions = 0  # Current position (number of shares)
         self.cash = initial_capital  # Current cash
+        self.indicators = {}
+        self.strategy_state = None
+        self.last_date = None  # Date of the last row backtested
+        self.fills = None
         self.results = None
 
-    def run(self):
+    def run(self, checkpoint=None):
         """
         Execute backtesting.
         
+        Args:
+            checkpoint (dict, optional): Checkpoint of an earlier run to continue from;
+                the data must then hold only the rows after the checkpoint date
+        
         Returns:
             pd.DataFrame: Backtesting results with asset values over time
+        
+        Raises:
+            Exception: If the checkpoint cannot be resumed with this data or strategy
         """
-        # Generate trading signals
-        signals = self.strategy.generate_signals()
-        self.data['信号'] = signals
+        if checkpoint is not None:
+            self._restore(checkpoint)
 
-        # Initialize asset value columns, explicitly specify data type as float
-        self.data['资产价值'] = float(self.initial_capital)
-        self.data['持仓数量'] = 0.0
-        self.data['现金'] = float(self.initial_capital)
+        # Generate trading signals from read-only column arrays
+        required = {'收盘', '开盘', '高', '低'} if self.execution is not None else {'收盘'}
+        columns = column_arrays(self.data, set(self.strategy.columns) | required)
+        if self.strategy.resumable:
+            state = checkpoint['strategy'] if checkpoint is not None else None
+            signals, self.indicators, self.strategy_state = self.strategy.resume(columns, state)
+        else:
+            signals, self.indicators = self.strategy.compute(columns)
+        self.strategy.indicators = self.indicators
+        if self.compact:
+            signals = np.nan_to_num(signals, nan=0).astype(np.int8)
 
-        # Ensure these columns have float data type
-        self.data = self.data.astype({'资产价值': 'float64', '持仓数量': 'float64', '现金': 'float64'})
+        prices = columns['收盘']
 
         # Ensure index is datetime type
-        if not pd.api.types.is_datetime64_any_dtype(self.data.index):
-            self.data.index = pd.to_datetime(self.data.index)
+        index = self.data.index
+        if not pd.api.types.is_datetime64_any_dtype(index):
+            index = pd.to_datetime(index)
+
+        if self.execution is not None:
+            positions, cash, asset_values = self._execute(signals, columns, index)
+        else:
+            positions, cash, asset_values = self._trade_at_close(signals, prices, index)
+
+        # Results reuse the price columns of the base frame instead of copying them
+        result_columns = {name: self.data[name].array for name in self.data.columns}
+        result_columns.update({
+            '信号': signals,
+            '资产价值': asset_values,
+            '持仓数量': positions,
+            '现金': cash
+        })
+        self.results = pd.DataFrame(result_columns, index=index, copy=False)
+        if len(index) > 0:
+            self.last_date = index[-1]
+        return self.results
+
+    def checkpoint(self):
+        """
+        Capture the state needed to continue backtesting after the last row.
+        
+        Returns:
+            dict: Date of the last row, cash, positions, strategy parameters and state
+        
+        Raises:
+            Exception: If backtesting has not been run yet or cannot be resumed
+        """
+        if self.results is None:
+            raise Exception("Please run backtesting first (run method)")
+        if not self.strategy.resumable:
+            raise Exception(f"{type(self.strategy).__name__} does not support resuming from a checkpoint")
+        if self.execution is not None:
+            raise Exception("Checkpoints are not supported with an execution engine")
+        return {
+            'date': self.last_date,
+            'initial_capital': self.initial_capital,
+            'cash': self.cash,
+            'positions': self.positions,
+            'params': self.strategy.params,
+            'strategy': self.strategy_state
+        }
+
+    def _restore(self, checkpoint):
+        """Restore cash and positions from a checkpoint after validating it."""
+        if not self.strategy.resumable:
+            raise Exception(f"{type(self.strategy).__name__} does not support resuming from a checkpoint")
+        if self.execution is not None:
+            raise Exception("Checkpoints are not supported with an execution engine")
+        if self.strategy.params != checkpoint['params']:
+            raise Exception("Strategy parameters differ from the checkpoint, please rerun from the full history")
+        if len(self.data) > 0 and self.data.index[0] <= checkpoint['date']:
+            raise Exception(f"Data must start after the checkpoint date {checkpoint['date']}")
+        self.initial_capital = checkpoint['initial_capital']
+        self.last_date = checkpoint['date']
+        self.cash = checkpoint['cash']
+        self.positions = checkpoint['positions']
+
+    def _trade_at_close(self, signals, prices, index):
+        """
+        Fill every signal as a market order at the closing price.
+        
+        Returns:
+            tuple: Daily (positions, cash, asset values) arrays
+        """
+        n = len(prices)
+        asset_values = np.empty(n, dtype=np.float64)
+        positions = np.empty(n, dtype=np.int64 if self.compact else np.float64)
+        cash = np.empty(n, dtype=np.float64)
 
         # Iterate through each trading day to execute trades
-        for i, (date, row) in enumerate(self.data.iterrows()):
-            current_price = row['收盘']  # Execute trades at closing price
-            signal = row['信号']
+        for i in range(n):
+            date = index[i]
+            current_price = float(prices[i])  # Execute trades at closing price
+            signal = signals[i]
 
             # Buy signal: Buy with all cash (excluding transaction fees)
             if signal == 1 and self.cash > 0:
@@ -55,28 +337,57 @@ class Backtester:
                 if shares_to_buy > 0:
                     self.positions += shares_to_buy
                     self.cash -= shares_to_buy * current_price
-                    print(
-                        f"Buy: {date.date()}, Price: {current_price:.2f}, Shares: {shares_to_buy}, Cash left: {self.cash:.2f}")
+                    if self.verbose:
+                        print(
+                            f"Buy: {date.date()}, Price: {current_price:.2f}, Shares: {shares_to_buy}, Cash left: {self.cash:.2f}")
 
             # Sell signal: Sell all positions
             elif signal == -1 and self.positions > 0:
                 shares_to_sell = self.positions
                 self.cash += shares_to_sell * current_price
                 self.positions -= shares_to_sell
-                print(f"Sell: {date.date()}, Price: {current_price:.2f}, Shares: {shares_to_sell}, Cash: {self.cash:.2f}")
+                if self.verbose:
+                    print(f"Sell: {date.date()}, Price: {current_price:.2f}, Shares: {shares_to_sell}, Cash: {self.cash:.2f}")
 
             # Update daily asset value (cash + position value)
-            self.data.at[date, '持仓数量'] = float(self.positions)
-            self.data.at[date, '现金'] = float(self.cash)
-            self.data.at[date, '资产价值'] = float(self.cash + (self.positions * current_price))
+            positions[i] = self.positions
+            cash[i] = self.cash
+            asset_values[i] = self.cash + (self.positions * current_price)
+        return positions, cash, asset_values
 
-        self.results = self.data
-        return self.results
+    def _execute(self, signals, columns, index):
+        """
+        Fill the signals through the execution engine.
+        
+        Returns:
+            tuple: Daily (positions, cash, asset values) arrays
+        """
+        prices = columns['收盘']
+        positions, cash, fills = self.execution.execute(
+            signals, columns['开盘'], columns['高'], columns['低'], prices, self.initial_capital)
+        for fill in fills:
+            fill['日期'] = index[fill['bar']]
+            if self.verbose:
+                action = 'Buy' if fill['side'] == 1 else 'Sell'
+                print(f"{action}: {fill['日期'].date()}, Price: {fill['price']:.2f}, Shares: {fill['shares']}, "
+                      f"Cash: {fill['cash']:.2f}, Reason: {fill['reason']}")
+        self.fills = pd.DataFrame(fills, columns=['日期', 'bar', 'side', 'price', 'shares', 'cash', 'reason'])
+
+        self.positions = int(positions[-1])
+        self.cash = float(cash[-1])
+        asset_values = cash + positions * prices
+        if not self.compact:
+            positions = positions.astype(np.float64)
+        return positions, cash, asset_values
 
     def get_metrics(self):
         """
         Calculate backtesting metrics.
         
+        With an execution engine the trade count, pairs and win rate come from
+        the actual fills, including stop-loss/take-profit exits at their fill
+        prices; unfilled orders are not trades.
+        
         Returns:
             dict: Dictionary containing various backtesting metrics
         
@@ -85,43 +396,5 @@ class Backtester:
         """
         if self.results is None:
             raise Exception("Please run backtesting first (run method)")
-
-        # Number of trades (buys + sells, each complete trade counts as 2 signals)
-        total_signals = len(self.results[self.results['信号'] != 0])
-        trade_count = total_signals  # Each buy/sell is counted as one trade
-
-        # Win rate: profitable trades / total trades (requires paired buy-sell signals)
-        profits = []
-        buy_signals = self.results[self.results['信号'] == 1]
-        sell_signals = self.results[self.results['信号'] == -1]
-
-        # Pair buy and sell signals (take the smaller count)
-        min_pairs = min(len(buy_signals), len(sell_signals))
-        for i in range(min_pairs):
-            buy_price = buy_signals.iloc[i]['收盘']
-            sell_price = sell_signals.iloc[i]['收盘']
-            profit = (sell_price - buy_price) / buy_price
-            profits.append(profit)
-
-        winning_trades = len([p for p in profits if p > 0])
-        win_rate = (winning_trades / min_pairs) * 100 if min_pairs > 0 else 0
-
-        # Total return
-        final_value = self.results.iloc[-1]['资产价值']
-        total_return = ((final_value - self.initial_capital) / self.initial_capital) * 100
-
-        # Maximum drawdown: maximum decline in asset value from peak to trough
-        rolling_max = self.results['资产价值'].cummax()
-        daily_drawdown = (self.results['资产价值'] - rolling_max) / rolling_max
-        max_drawdown = (daily_drawdown.min() * 100) if len(daily_drawdown) > 0 else 0
-
-        return {
-            '初始资金': self.initial_capital,
-            '最终资产': final_value,
-            '总收益率(%)': round(total_return, 2),
-            '交易次数': trade_count,
-            '盈利交易次数': winning_trades,
-            '总交易对': min_pairs,
-            '胜率(%)': round(win_rate, 2),
-            '最大回撤(%)': round(max_drawdown, 2)
-        }
\ No newline at end of file
+        return calculate_metrics(self.results, self.initial_capital,
+                                 self.fills if self.execution is not None else None)
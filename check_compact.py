@@ -0,0 +1,63 @@
+import glob
+import os
+import sys
+
+import yaml
+
+from backtester import Backtester, compare_metrics
+from data_loader import DataLoader
+from strategies import (LinearRegressionStrategy, MACDStrategy, MovingAverageStrategy, PolynomialRegressionStrategy,
+                        RandomForestStrategy, RSIStrategy)
+
+
+def main():
+    """
+    Check that compact mode reproduces the float64 backtests.
+
+    Every strategy is backtested on every symbol in stock_data once with
+    float64 data and once with compact data, and the metrics are compared
+    against COMPACT_TOLERANCES. Exits with status 1 if any metric is outside
+    its tolerance.
+    """
+    with open('config.yaml', 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    initial_capital = config.get('initial_capital', 100000)
+    strategies = {
+        'Moving Average Strategy': (MovingAverageStrategy, config['strategies']['moving_average']),
+        'RSI Strategy': (RSIStrategy, config['strategies']['rsi']),
+        'MACD Strategy': (MACDStrategy, config['strategies']['macd']),
+        'Linear Regression Strategy': (LinearRegressionStrategy, config['strategies'].get('ml', {})),
+        'Polynomial Regression Strategy': (PolynomialRegressionStrategy, config['strategies'].get('ml', {})),
+        'Random Forest Strategy': (RandomForestStrategy, config['strategies'].get('ml', {}))
+    }
+
+    failures = 0
+    for data_file in sorted(glob.glob(os.path.join('stock_data', '*.csv'))):
+        symbol = os.path.splitext(os.path.basename(data_file))[0]
+        data = DataLoader(compact=False, data_file=data_file).get_data()
+        compact_data = DataLoader(compact=True, data_file=data_file).get_data()
+
+        for name, (strategy_class, params) in strategies.items():
+            metrics = []
+            for frame, compact in ((data, False), (compact_data, True)):
+                backtester = Backtester(frame, strategy_class(frame, params=params), initial_capital,
+                                        compact=compact, verbose=False)
+                backtester.run()
+                metrics.append(backtester.get_metrics())
+
+            differences = compare_metrics(*metrics)
+            if differences:
+                failures += 1
+                print(f"{symbol} {name}: FAILED {differences}")
+            else:
+                print(f"{symbol} {name}: OK")
+
+    if failures:
+        print(f"{failures} backtests outside the compact tolerances")
+        sys.exit(1)
+    print("All compact backtests within tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+
+import yaml
+
+from backtester import Backtester, load_checkpoint, save_checkpoint
+from data_loader import DataLoader
+from strategies import MACDStrategy, MovingAverageStrategy, RSIStrategy
+
+
+def main():
+    """
+    Bring the checkpointed backtests up to date with the newest rows.
+
+    The first run backtests the full history. Later runs read only the rows
+    added to the data file since the checkpoint and continue from the saved
+    cash, positions and indicator state, so a daily update costs O(new rows).
+    """
+    with open('config.yaml', 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    initial_capital = config.get('initial_capital', 100000)
+    checkpoint_dir = config.get('checkpoint_dir', 'checkpoints')
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    data_loader = DataLoader()
+    symbol = os.path.splitext(os.path.basename(data_loader.data_file))[0]
+
+    strategies = {
+        'Moving Average Strategy': (MovingAverageStrategy, 'moving_average'),
+        'RSI Strategy': (RSIStrategy, 'rsi'),
+        'MACD Strategy': (MACDStrategy, 'macd')
+    }
+
+    for name, (strategy_class, key) in strategies.items():
+        path = os.path.join(checkpoint_dir, f"{symbol}_{strategy_class.__name__}.pkl")
+        if os.path.exists(path):
+            checkpoint = load_checkpoint(path)
+            data = data_loader.load_new_rows(checkpoint['date'])
+        else:
+            checkpoint = None
+            data = data_loader.get_data()
+
+        backtester = Backtester(data, strategy_class(data, params=config['strategies'][key]), initial_capital)
+        results = backtester.run(checkpoint=checkpoint)
+        save_checkpoint(path, backtester.checkpoint())
+
+        if len(results) > 0:
+            print(f"{name}: {len(results)} new rows up to {backtester.last_date.date()}, "
+                  f"asset value: {results['资产价值'].iloc[-1]:.2f}")
+        else:
+            print(f"{name}: no new rows since {backtester.last_date.date()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import yaml
 
@@ -5,17 +6,25 @@ import yaml
 class DataLoader:
     """Class for loading and preprocessing stock data from CSV files."""
     
-    def __init__(self):
+    def __init__(self, compact=None, data_file=None):
         """
         Initialize the DataLoader by loading the data file path from config.
+        
+        Args:
+            compact (bool, optional): Load numeric columns as float32 and the volume
+                column as nullable Int64 instead of float64. Defaults to the `compact`
+                setting in data_loader.yml (off)
+            data_file (str, optional): CSV file to load instead of the configured one
         """
         # Load configuration to get data file path and column names
         with open('data_loader.yml', 'r', encoding='utf-8') as f:
             config = yaml.safe_load(f)
-        self.data_file = config.get('data_file', '600016.csv')
+        self.data_file = data_file or config.get('data_file', '600016.csv')
         self.column_names = config.get('column_names', {})
         self.numeric_columns = config.get('numeric_columns', ['收盘', '开盘', '高', '低', '涨跌幅'])
         self.volume_column = config.get('volume_column', '交易量')
+        self.compact = config.get('compact', False) if compact is None else compact
+        self.chunk_size = config.get('chunk_size', 64)  # Rows read at a time by load_new_rows
         self.data = None
 
     def load_data(self):
@@ -32,51 +41,7 @@ class DataLoader:
             # Print the name of the file being read
             print(f"Reading data from file: {self.data_file}")
             # Read CSV file with utf-8 encoding
-            self.data = pd.read_csv(self.data_file, encoding='utf-8')
-
-            # Get column names from config
-            date_col = self.column_names.get('date', '日期')
-            close_col = self.column_names.get('close', '收盘')
-            open_col = self.column_names.get('open', '开盘')
-            high_col = self.column_names.get('high', '高')
-            low_col = self.column_names.get('low', '低')
-            change_col = self.column_names.get('change_percent', '涨跌幅')
-            volume_col = self.column_names.get('volume', '交易量')
-
-            # Convert date column
-            self.data[date_col] = pd.to_datetime(self.data[date_col])
-
-            # Sort by date (ensure data is in chronological order)
-            self.data = self.data.sort_values(date_col)
-            
-            # Set date column as index
-            self.data.set_index(date_col, inplace=True)
-
-            # Convert numeric columns, remove percentage signs and convert to float
-            for col in self.numeric_columns:
-                if col == change_col:
-                    # Process the change percentage column, remove % sign and convert to float
-                    self.data[col] = self.data[col].str.replace('%', '').astype(float) / 100
-                else:
-                    # Process other numeric columns
-                    self.data[col] = self.data[col].astype(float)
-
-            # Process volume column, supporting both M (million) and B (billion) units
-            volume_series = self.data[volume_col].copy()
-
-            # Handle million units
-            mask_m = volume_series.str.contains('M', na=False)
-            if mask_m.any():
-                volume_series.loc[mask_m] = volume_series.loc[mask_m].str.replace('M', '').astype(float) * 1e6
-
-            # Handle billion units
-            mask_b = volume_series.str.contains('B', na=False)
-            if mask_b.any():
-                volume_series.loc[mask_b] = volume_series.loc[mask_b].str.replace('B', '').astype(float) * 1e9
-
-            # Convert to float
-            self.data[volume_col] = volume_series.astype(float)
-
+            self.data = self._preprocess(pd.read_csv(self.data_file, encoding='utf-8'))
             return self.data
 
         except FileNotFoundError:
@@ -84,6 +49,125 @@ class DataLoader:
         except Exception as e:
             raise Exception(f"Error occurred while loading data: {str(e)}")
 
+    def load_new_rows(self, since):
+        """
+        Load only the rows dated after `since`.
+        
+        The CSV files list the newest day first, so new rows are at the top:
+        the file is read in chunks from the start until a row dated on or
+        before `since` is reached, making a daily update cost O(new rows).
+        Files in chronological order are read fully and filtered.
+        
+        Args:
+            since (pd.Timestamp): Date of the last row already loaded
+        
+        Returns:
+            pd.DataFrame: Processed new rows in chronological order (may be empty)
+        
+        Raises:
+            Exception: If file is not found or data processing fails
+        """
+        date_col = self.column_names.get('date', '日期')
+        since = pd.Timestamp(since)
+        try:
+            chunks = []
+            # The context manager closes the file when the loop stops early
+            with pd.read_csv(self.data_file, encoding='utf-8', chunksize=self.chunk_size) as reader:
+                for chunk in reader:
+                    dates = pd.to_datetime(chunk[date_col])
+                    chunks.append(chunk[dates > since])
+                    # Newest-first file: everything after an old row is old as well
+                    if (dates <= since).any() and dates.is_monotonic_decreasing:
+                        break
+            new_rows = pd.concat(chunks)
+            print(f"Read {len(new_rows)} new rows from file: {self.data_file}")
+            return self._preprocess(new_rows)
+
+        except FileNotFoundError:
+            raise Exception(f"Data file {self.data_file} not found, please check if the file path is correct")
+        except Exception as e:
+            raise Exception(f"Error occurred while loading data: {str(e)}")
+
+    def refresh(self):
+        """
+        Append the rows added to the CSV file since the last load.
+        
+        If nothing has been loaded yet, the full file is loaded and there are
+        no new rows since that load, so an empty frame is returned; the data
+        is available from get_data in both cases.
+        
+        Returns:
+            pd.DataFrame: The new rows (may be empty)
+        """
+        if self.data is None:
+            self.load_data()
+            return self.data.iloc[:0]
+        new_rows = self.load_new_rows(self.data.index[-1])
+        if len(new_rows) > 0:
+            self.data = pd.concat([self.data, new_rows])
+        return new_rows
+
+    def _preprocess(self, data):
+        """
+        Convert raw CSV rows into the processed, date-indexed format.
+        
+        Args:
+            data (pd.DataFrame): Rows as read from the CSV file
+        
+        Returns:
+            pd.DataFrame: Processed rows in chronological order
+        """
+        # Get column names from config
+        date_col = self.column_names.get('date', '日期')
+        close_col = self.column_names.get('close', '收盘')
+        open_col = self.column_names.get('open', '开盘')
+        high_col = self.column_names.get('high', '高')
+        low_col = self.column_names.get('low', '低')
+        change_col = self.column_names.get('change_percent', '涨跌幅')
+        volume_col = self.column_names.get('volume', '交易量')
+
+        # Convert date column
+        data[date_col] = pd.to_datetime(data[date_col])
+
+        # Sort by date (ensure data is in chronological order)
+        data = data.sort_values(date_col)
+
+        # Set date column as index
+        data.set_index(date_col, inplace=True)
+
+        # Convert numeric columns, remove percentage signs and convert to float
+        for col in self.numeric_columns:
+            if col == change_col:
+                # Process the change percentage column, remove % sign and convert to float
+                data[col] = data[col].str.replace('%', '').astype(float) / 100
+            else:
+                # Process other numeric columns
+                data[col] = data[col].astype(float)
+
+        # Process volume column, supporting both M (million) and B (billion) units
+        volume_series = data[volume_col].copy()
+
+        # Handle million units
+        mask_m = volume_series.str.contains('M', na=False)
+        if mask_m.any():
+            volume_series.loc[mask_m] = volume_series.loc[mask_m].str.replace('M', '').astype(float) * 1e6
+
+        # Handle billion units
+        mask_b = volume_series.str.contains('B', na=False)
+        if mask_b.any():
+            volume_series.loc[mask_b] = volume_series.loc[mask_b].str.replace('B', '').astype(float) * 1e9
+
+        # Convert to float
+        data[volume_col] = volume_series.astype(float)
+
+        # Compact mode: halve the price columns and store whole-share volumes.
+        # The nullable Int64 dtype keeps missing volumes as <NA> instead of failing
+        if self.compact:
+            data = data.astype({col: np.float32 for col in self.numeric_columns})
+            data[volume_col] = data[volume_col].round().astype('Int64')
+
+        return data
+
     def get_data(self):
         """
         Get the processed stock data.
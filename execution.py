@@ -0,0 +1,222 @@
+import numpy as np
+
+
+def first_cross(values, start, stop, level, below):
+    """
+    Find the first bar in [start, stop) whose value crosses a price level.
+
+    The running minimum (or maximum) of the bars is monotonic, so the first
+    crossing is found with a binary search instead of a per-bar loop.
+
+    Args:
+        values (np.ndarray): Low prices when `below`, high prices otherwise
+        start (int): First bar to check
+        stop (int): Bar after the last bar to check
+        level (float): Trigger price
+        below (bool): Trigger when the value falls to or below the level,
+            otherwise when it rises to or above it
+
+    Returns:
+        int or None: Bar of the first crossing, None if the level is not crossed
+    """
+    if start >= stop:
+        return None
+    segment = values[start:stop]
+    if below:
+        offset = np.searchsorted(-np.minimum.accumulate(segment), -level, side='left')
+    else:
+        offset = np.searchsorted(np.maximum.accumulate(segment), level, side='left')
+    return start + int(offset) if offset < len(segment) else None
+
+
+class ExecutionEngine:
+    """Order execution engine filling orders against OHLC bars."""
+
+    ORDER_TYPES = ('market', 'next_open', 'limit', 'stop')
+
+    def __init__(self, order_type='market', offset=0.0, valid_bars=None, stop_loss=None, take_profit=None):
+        """
+        Initialize the ExecutionEngine.
+
+        Orders are placed at the close of the bar with the signal:
+        - market: fill at that close
+        - next_open: fill at the open of the next bar
+        - limit: buy `offset` below (sell above) the close, filled at the first later
+          bar whose low (high) reaches the limit, at the limit or a better open
+        - stop: buy `offset` above (sell below) the close, filled at the first later
+          bar whose high (low) reaches the stop, at the stop or a worse open
+        Pending orders are cancelled by the next signal or after `valid_bars` bars.
+
+        Args:
+            order_type (str): One of ORDER_TYPES
+            offset (float): Limit/stop distance from the signal close as a fraction
+            valid_bars (int, optional): Bars a limit/stop order stays pending
+            stop_loss (float, optional): Exit a position when the low falls this
+                fraction below the entry price
+            take_profit (float, optional): Exit a position when the high rises this
+                fraction above the entry price
+
+        Raises:
+            Exception: If the order type is not supported
+        """
+        if order_type not in self.ORDER_TYPES:
+            raise Exception(f"Unsupported order type {order_type}, expected one of {self.ORDER_TYPES}")
+        self.order_type = order_type
+        self.offset = offset
+        self.valid_bars = valid_bars
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+
+    def _order_end(self, bar, next_signal, n):
+        """Last bar an order placed at `bar` can fill on."""
+        end = min(next_signal, n - 1)
+        if self.valid_bars is not None:
+            end = min(end, bar + self.valid_bars)
+        return end
+
+    def _order_fill(self, bar, side, end, open_, high, low, close):
+        """
+        Fill an order placed at the close of `bar`.
+
+        Args:
+            bar (int): Bar with the signal
+            side (int): 1 to buy, -1 to sell
+            end (int): Last bar the order can fill on
+
+        Returns:
+            tuple or None: (fill bar, fill price), None if the order is not filled
+        """
+        if self.order_type == 'market':
+            return bar, close[bar]
+        if self.order_type == 'next_open':
+            return (bar + 1, open_[bar + 1]) if bar + 1 < len(close) else None
+
+        # Buy limits and sell stops trigger on the low, the other two on the high
+        below = (side == 1) == (self.order_type == 'limit')
+        direction = -1 if below else 1
+        level = close[bar] * (1 + direction * self.offset)
+        fill_bar = first_cross(low if below else high, bar + 1, end + 1, level, below)
+        if fill_bar is None:
+            return None
+        # Gaps through the level fill at the open
+        price = min(open_[fill_bar], level) if below else max(open_[fill_bar], level)
+        return fill_bar, price
+
+    def _bracket_fill(self, start, end, entry_price, open_, high, low):
+        """
+        Find the stop-loss or take-profit exit of a position in bars [start, end].
+
+        When both trigger on the same bar the stop-loss is assumed to hit first.
+
+        Returns:
+            tuple or None: (fill bar, fill price, reason), None if neither triggers
+        """
+        exits = []
+        if self.stop_loss is not None:
+            level = entry_price * (1 - self.stop_loss)
+            bar = first_cross(low, start, end + 1, level, below=True)
+            if bar is not None:
+                exits.append((bar, 0, min(open_[bar], level), 'stop_loss'))
+        if self.take_profit is not None:
+            level = entry_price * (1 + self.take_profit)
+            bar = first_cross(high, start, end + 1, level, below=False)
+            if bar is not None:
+                exits.append((bar, 1, max(open_[bar], level), 'take_profit'))
+        if not exits:
+            return None
+        bar, _, price, reason = min(exits)
+        return bar, price, reason
+
+    def execute(self, signals, open_, high, low, close, initial_capital):
+        """
+        Execute the signals as orders, holding at most one position at a time.
+
+        A buy signal while flat invests all cash, a sell signal while long sells
+        all shares. Work is done per signal, not per bar: fills and bracket exits
+        are located with array searches and the holdings are expanded to daily
+        arrays at the end.
+
+        Args:
+            signals (np.ndarray): Trading signals (-1 for sell, 0 for hold, 1 for buy)
+            open_ (np.ndarray): Opening prices
+            high (np.ndarray): High prices
+            low (np.ndarray): Low prices
+            close (np.ndarray): Closing prices
+            initial_capital (float): Initial capital
+
+        Returns:
+            tuple: (positions, cash, fills) with daily np.ndarray share counts and cash,
+                and a list of fill dicts with 'bar', 'side', 'price', 'shares', 'cash'
+                (after the fill) and 'reason'
+        """
+        n = len(close)
+        events = np.flatnonzero((signals == 1) | (signals == -1))
+        # Next signal bar after each signal, the last signal runs to the end
+        next_signals = np.append(events[1:], n - 1)
+        fills = []
+        cash = float(initial_capital)
+
+        e = 0
+        while e < len(events):
+            bar = events[e]
+            if signals[bar] != 1 or cash <= 0:
+                e += 1
+                continue
+
+            entry = self._order_fill(bar, 1, self._order_end(bar, next_signals[e], n), open_, high, low, close)
+            e += 1
+            if entry is None:
+                continue
+            entry_bar, entry_price = entry[0], float(entry[1])
+            shares = int(cash / entry_price)
+            if shares <= 0:
+                continue
+            cash -= shares * entry_price
+            fills.append({'bar': entry_bar, 'side': 1, 'price': entry_price, 'shares': shares,
+                          'cash': cash, 'reason': 'signal'})
+
+            # Find the exit: the first filled sell order or an earlier bracket exit.
+            # Next-open entries can hit a bracket intrabar on the entry bar itself.
+            scan = entry_bar if self.order_type == 'next_open' else entry_bar + 1
+            exit_fill = None
+            while exit_fill is None:
+                while e < len(events) and signals[events[e]] != -1:
+                    e += 1
+                order = None
+                if e < len(events):
+                    sell_bar = events[e]
+                    end = self._order_end(sell_bar, next_signals[e], n)
+                    order = self._order_fill(sell_bar, -1, end, open_, high, low, close)
+                    e += 1
+                    if order is not None:
+                        # Next-open fills happen before any intrabar trigger
+                        end = order[0] - 1 if self.order_type == 'next_open' else order[0]
+                else:
+                    end = n - 1
+
+                bracket = self._bracket_fill(scan, end, entry_price, open_, high, low)
+                if bracket is not None:
+                    exit_fill = bracket
+                elif order is not None:
+                    exit_fill = (order[0], order[1], 'signal')
+                elif end >= n - 1:
+                    break
+                else:
+                    scan = end + 1
+
+            if exit_fill is None:
+                break
+            exit_bar, exit_price, reason = exit_fill
+            cash += shares * float(exit_price)
+            fills.append({'bar': exit_bar, 'side': -1, 'price': float(exit_price), 'shares': shares,
+                          'cash': cash, 'reason': reason})
+            # Resume with the signals from the exit bar on
+            e = int(np.searchsorted(events, exit_bar, side='left'))
+
+        # Expand fills to daily holdings: each bar takes the state after its last fill
+        state = np.zeros(n, dtype=np.int64)
+        state[[fill['bar'] for fill in fills]] = np.arange(1, len(fills) + 1)
+        state = np.maximum.accumulate(state)
+        positions = np.array([0] + [fill['shares'] if fill['side'] == 1 else 0 for fill in fills], dtype=np.int64)
+        cash = np.array([initial_capital] + [fill['cash'] for fill in fills], dtype=np.float64)
+        return positions[state], cash[state], fills
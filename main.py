@@ -1,6 +1,7 @@
 from data_loader import DataLoader
 from strategies import MovingAverageStrategy, RSIStrategy, MACDStrategy, LinearRegressionStrategy, PolynomialRegressionStrategy, RandomForestStrategy
 from backtester import Backtester
+from execution import ExecutionEngine
 from visualizer import Visualizer
 import yaml
 
@@ -16,6 +17,9 @@ def main():
         config = yaml.safe_load(f)
     
     initial_capital = config.get('initial_capital', 100000)
+    # Fill orders through the execution engine when configured, otherwise at the close
+    execution_config = config.get('execution')
+    execution = ExecutionEngine(**execution_config) if execution_config else None
     
     # 2. Load data
     print("Loading stock data...")
@@ -58,7 +62,8 @@ def main():
     print("Running strategy backtesting...")
     for name, strategy in strategies.items():
         print(f"Running {name}...")
-        backtester = Backtester(data, strategy, initial_capital)
+        backtester = Backtester(data, strategy, initial_capital, compact=data_loader.compact,
+                                execution=execution)
         strategy_results = backtester.run()
         strategy_metrics = backtester.get_metrics()
         
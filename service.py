@@ -0,0 +1,336 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from backtester import calculate_metrics, simulate_signals
+from data_loader import DataLoader
+from strategies import (LinearRegressionStrategy, MACDStrategy, MovingAverageStrategy, PolynomialRegressionStrategy,
+                        RandomForestStrategy, RSIStrategy)
+from strategies.array_strategy import ArrayStrategy, LegacyStrategyAdapter, column_arrays
+
+# Strategies the service can evaluate, by class name
+SERVICE_STRATEGIES = {
+    cls.__name__: cls for cls in (MovingAverageStrategy, RSIStrategy, MACDStrategy, LinearRegressionStrategy,
+                                  PolynomialRegressionStrategy, RandomForestStrategy)
+}
+
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry beyond a maximum size."""
+
+    def __init__(self, max_size):
+        """
+        Initialize the LRUCache.
+
+        Args:
+            max_size (int): Maximum number of entries kept
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Get an entry, marking it as recently used.
+
+        Returns:
+            object or None: Cached value, None if the key is not cached
+        """
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        """Add an entry, evicting the least recently used one when full."""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: Size, maximum size, hits and misses
+        """
+        with self.lock:
+            return {'size': len(self.entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+class BacktestService:
+    """Long-lived backtest evaluator keeping data and signals warm in memory.
+
+    Concurrent requests for the same symbol are collected for a short batch
+    window and evaluated together: the data is loaded once, each distinct
+    strategy/parameter set is computed once, and all signal sets are
+    simulated in one vectorized pass.
+    """
+
+    def __init__(self, data_dir='stock_data', max_symbols=16, max_signal_sets=256, batch_window=0.01,
+                 initial_capital=100000):
+        """
+        Initialize the BacktestService.
+
+        Args:
+            data_dir (str): Directory with one <symbol>.csv file per symbol
+            max_symbols (int): Loaded symbols kept in memory
+            max_signal_sets (int): Computed signal and indicator sets kept in memory
+                (for the regression strategies this includes the fitted model's output)
+            batch_window (float): Seconds the first request for a symbol waits for
+                other requests to join its batch
+            initial_capital (float): Initial capital for requests that do not set one
+        """
+        self.data_dir = data_dir
+        self.batch_window = batch_window
+        self.initial_capital = initial_capital
+        self.data_cache = LRUCache(max_symbols)
+        self.signal_cache = LRUCache(max_signal_sets)
+
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.pending = {}  # Symbol to the requests waiting for its next batch
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=1000)  # Seconds, most recent requests
+
+    def _get_data(self, symbol):
+        """Get the price data of a symbol, loading it on first use."""
+        data = self.data_cache.get(symbol)
+        if data is None:
+            if os.path.basename(symbol) != symbol:
+                raise Exception(f"Invalid symbol {symbol}")
+            # Load each symbol once even when several batches miss the cache at the same time
+            with self.load_lock:
+                data = self.data_cache.get(symbol)
+                if data is None:
+                    data = DataLoader(data_file=os.path.join(self.data_dir, f"{symbol}.csv")).get_data()
+                    self.data_cache.put(symbol, data)
+        return data
+
+    def _get_signals(self, symbol, data, strategy_name, params):
+        """Get the signals of a strategy/parameter set, computing them on first use."""
+        key = (symbol, strategy_name, json.dumps(params, sort_keys=True))
+        signals = self.signal_cache.get(key)
+        if signals is None:
+            if strategy_name not in SERVICE_STRATEGIES:
+                raise Exception(f"Unknown strategy {strategy_name}, expected one of {list(SERVICE_STRATEGIES)}")
+            strategy = SERVICE_STRATEGIES[strategy_name](data, params=params)
+            if not isinstance(strategy, ArrayStrategy):
+                strategy = LegacyStrategyAdapter(strategy, data.index)
+            signals, _ = strategy.compute(column_arrays(data, strategy.columns))
+            self.signal_cache.put(key, signals)
+        return signals
+
+    def _run_batch(self, symbol, batch):
+        """Evaluate all requests of a batch and hand each its result or error."""
+        try:
+            data = self._get_data(symbol)
+        except Exception as e:
+            for item in batch:
+                item['error'] = e
+            return
+
+        valid = []
+        for item in batch:
+            request = item['request']
+            try:
+                try:
+                    item['capital'] = float(request.get('initial_capital', self.initial_capital))
+                except (TypeError, ValueError):
+                    raise Exception(f"Invalid initial_capital {request.get('initial_capital')!r}")
+                if not np.isfinite(item['capital']) or item['capital'] <= 0:
+                    raise Exception(f"initial_capital must be positive, got {item['capital']}")
+                item['signals'] = self._get_signals(symbol, data, request['strategy'], request.get('params', {}))
+                valid.append(item)
+            except Exception as e:
+                item['error'] = e
+
+        if valid:
+            try:
+                # Widened like in Backtester, so compact data gives the same metrics
+                close = column_arrays(data, ['收盘'])['收盘']
+                signals = np.column_stack([np.asarray(item['signals'], dtype=np.float64) for item in valid])
+                capital = np.array([item['capital'] for item in valid], dtype=np.float64)
+                _, _, asset_values = simulate_signals(signals, close, capital)
+                for j, item in enumerate(valid):
+                    results = pd.DataFrame({'收盘': close, '信号': signals[:, j], '资产价值': asset_values[:, j]},
+                                           index=data.index, copy=False)
+                    metrics = calculate_metrics(results, item['capital'])
+                    # Cast NumPy scalars so the metrics can be returned as JSON
+                    item['result'] = {key: value.item() if hasattr(value, 'item') else value
+                                      for key, value in metrics.items()}
+            except Exception as e:
+                for item in valid:
+                    if item['result'] is None:
+                        item['error'] = e
+
+    def evaluate(self, request):
+        """
+        Backtest one request, batched with concurrent requests for the same symbol.
+
+        Args:
+            request (dict): 'symbol', 'strategy' (class name), optional 'params'
+                and optional 'initial_capital'
+
+        Returns:
+            dict: Metrics in the Backtester.get_metrics schema
+
+        Raises:
+            Exception: If the request is invalid or the backtest fails
+        """
+        started = time.perf_counter()
+        item = {'request': request, 'done': threading.Event(), 'result': None, 'error': None}
+        try:
+            if 'symbol' not in request or 'strategy' not in request:
+                raise Exception("Request must contain 'symbol' and 'strategy'")
+            symbol = str(request['symbol'])
+
+            with self.lock:
+                batch = self.pending.get(symbol)
+                leader = batch is None
+                if leader:
+                    batch = self.pending[symbol] = []
+                batch.append(item)
+
+            if leader:
+                # Collect the requests arriving during the batch window, then evaluate them together
+                time.sleep(self.batch_window)
+                with self.lock:
+                    batch = self.pending.pop(symbol)
+                    self.batches += 1
+                try:
+                    self._run_batch(symbol, batch)
+                finally:
+                    for waiting in batch:
+                        waiting['done'].set()
+            item['done'].wait()
+
+            if item['error'] is not None:
+                raise item['error']
+            if item['result'] is None:
+                raise Exception("Backtest finished without a result")
+            return item['result']
+        except Exception:
+            with self.lock:
+                self.errors += 1
+            raise
+        finally:
+            with self.lock:
+                self.requests += 1
+                self.latencies.append(time.perf_counter() - started)
+
+    def stats(self):
+        """
+        Get throughput, latency, batching and cache counters.
+
+        Returns:
+            dict: Service counters
+        """
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            uptime = time.time() - self.started
+            stats = {
+                'uptime_seconds': round(uptime, 3),
+                'requests': self.requests,
+                'errors': self.errors,
+                'batches': self.batches,
+                'requests_per_batch': round(self.requests / self.batches, 3) if self.batches else 0,
+                'throughput_per_second': round(self.requests / uptime, 3) if uptime > 0 else 0
+            }
+        if len(latencies) > 0:
+            stats['latency_ms'] = {
+                'mean': round(float(latencies.mean()), 3),
+                'p50': round(float(np.percentile(latencies, 50)), 3),
+                'p95': round(float(np.percentile(latencies, 95)), 3),
+                'max': round(float(latencies.max()), 3)
+            }
+        stats['data_cache'] = self.data_cache.stats()
+        stats['signal_cache'] = self.signal_cache.stats()
+        return stats
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """HTTP/JSON handler: POST /backtest, GET /stats and GET /health."""
+
+    service = None  # BacktestService shared by all requests
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.service.stats())
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/backtest':
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._send_json(400, {'error': f"Invalid JSON: {e}"})
+            return
+        try:
+            self._send_json(200, {'metrics': self.service.evaluate(request)})
+        except Exception as e:
+            self._send_json(400, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        # Request counters are exposed on /stats instead of per-request log lines
+        pass
+
+
+def main():
+    """
+    Start the backtest service with the settings from config.yaml.
+    """
+    with open('config.yaml', 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    settings = config.get('service', {})
+
+    ServiceHandler.service = BacktestService(
+        data_dir=settings.get('data_dir', 'stock_data'),
+        max_symbols=settings.get('max_symbols', 16),
+        max_signal_sets=settings.get('max_signal_sets', 256),
+        batch_window=settings.get('batch_window_ms', 10) / 1000,
+        initial_capital=config.get('initial_capital', 100000)
+    )
+    host = settings.get('host', '127.0.0.1')
+    port = settings.get('port', 8000)
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    print(f"Backtest service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
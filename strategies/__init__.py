@@ -1,4 +1,5 @@
 """Strategies module for financial trading strategies."""
+from strategies.array_strategy import ArrayStrategy, LegacyStrategyAdapter, column_arrays, widen_prices
 from strategies.base_strategy import TradingStrategy
 from strategies.linear_regression_strategy import LinearRegressionStrategy
 from strategies.macd_strategy import MACDStrategy
@@ -9,6 +10,10 @@ from strategies.rsi_strategy import RSIStrategy
 
 __all__ = [
     'TradingStrategy',
+    'ArrayStrategy',
+    'LegacyStrategyAdapter',
+    'column_arrays',
+    'widen_prices',
     'MovingAverageStrategy',
     'RSIStrategy',
     'MACDStrategy',
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+
+def widen_prices(values):
+    """
+    Convert float32 price storage back to float64 for computation.
+    
+    float32 keeps about 7 significant digits, so rounding to 7 significant
+    digits recovers the float64 value of prices quoted with fewer digits
+    (e.g. 4.05 instead of 4.050000190734863).
+    
+    Args:
+        values (np.ndarray): float32 price values
+    
+    Returns:
+        np.ndarray: float64 price values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.floor(np.log10(np.abs(values), where=values != 0, out=np.zeros_like(values)))
+    scale = 10.0 ** (6 - magnitude)
+    return np.round(values * scale) / scale
+
+
+def column_arrays(data, names):
+    """
+    Expose DataFrame columns as read-only NumPy arrays without copying.
+
+    Compact float32 columns are the exception: they are widened to new
+    float64 arrays so indicators are computed at full precision.
+
+    Args:
+        data (pd.DataFrame): Price data that owns the columns
+        names (iterable): Column names to expose
+
+    Returns:
+        dict: Mapping of column name to read-only np.ndarray view
+    """
+    columns = {}
+    for name in names:
+        values = data[name].to_numpy()
+        if values.dtype == np.float32:
+            values = widen_prices(values)
+        view = values.view()
+        view.flags.writeable = False
+        columns[name] = view
+    return columns
+
+
+class ArrayStrategy:
+    """Base class for copy-free trading strategies working on column arrays"""
+
+    # Columns the strategy reads from the price data
+    columns = ('收盘',)
+
+    def __init__(self, data=None, params=None):
+        """
+        Initialize the trading strategy.
+
+        Unlike TradingStrategy, the price data is only referenced and never
+        copied or mutated, so many strategies can share a single frame.
+
+        Args:
+            data (pd.DataFrame, optional): Historical price data
+            params (dict, optional): Strategy parameters
+        """
+        self.data = data
+        self.params = params or {}
+        self.signals = None
+        self.indicators = {}
+
+    def compute(self, columns):
+        """
+        Compute trading signals from column arrays. Must be implemented by subclasses.
+
+        Args:
+            columns (dict): Read-only np.ndarray for each name in `columns`
+
+        Returns:
+            tuple: (signals, indicators) where signals is an np.ndarray aligned
+                with the input rows (-1 for sell, 0 for hold, 1 for buy) and
+                indicators is a dict of np.ndarray indicator outputs
+        """
+        raise NotImplementedError("Subclasses must implement the compute method")
+
+    def resume(self, columns, state):
+        """
+        Compute trading signals continuing from a checkpoint. Optional for subclasses.
+
+        Args:
+            columns (dict): Read-only column arrays of the rows after the checkpoint
+            state (dict or None): State returned by the previous call, None at the
+                start of history
+
+        Returns:
+            tuple: (signals, indicators, state) for the given rows, where state is
+                what the next call needs to continue after the last row
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support resuming from a checkpoint")
+
+    @classmethod
+    def valid_params(cls, params):
+        """
+        Check whether a parameter set is meaningful for the strategy.
+
+        Used to drop invalid combinations from parameter grids. Subclasses
+        override this for parameters that depend on each other.
+
+        Args:
+            params (dict): Strategy parameters
+
+        Returns:
+            bool: True if the parameters can be used
+        """
+        return True
+
+    @property
+    def resumable(self):
+        """bool: Whether the strategy implements resume"""
+        return type(self).resume is not ArrayStrategy.resume
+
+    def generate_signals(self):
+        """
+        Generate trading signals for the referenced price data.
+
+        Returns:
+            pd.Series: Trading signals indexed like the price data
+        """
+        signals, self.indicators = self.compute(column_arrays(self.data, self.columns))
+        self.signals = pd.Series(signals, index=self.data.index, name='信号')
+        return self.signals
+
+
+class LegacyStrategyAdapter(ArrayStrategy):
+    """Adapter running a DataFrame-based TradingStrategy through the array interface"""
+
+    columns = ()
+
+    def __init__(self, strategy, index):
+        """
+        Initialize the adapter.
+
+        Args:
+            strategy (TradingStrategy): Legacy strategy working on its own data copy
+            index (pd.Index): Index of the price data the signals are aligned to
+        """
+        super().__init__(strategy.data, strategy.params)
+        self.strategy = strategy
+        self.index = index
+
+    def compute(self, columns):
+        """
+        Run the legacy strategy and align its signals to the price data.
+
+        Rows the legacy strategy dropped (e.g. while building lagged features)
+        are returned as NaN, matching how the Series used to be assigned.
+
+        Args:
+            columns (dict): Unused, the legacy strategy reads its own data
+
+        Returns:
+            tuple: (signals, indicators) with indicators left empty
+        """
+        signals = self.strategy.generate_signals()
+        return np.asarray(signals.reindex(self.index), dtype=float), {}
@@ -1,5 +1,15 @@
+import numpy as np
+
+from strategies.array_strategy import widen_prices
+
+
 class TradingStrategy:
-    """Base class for trading strategies"""
+    """Base class for DataFrame-based trading strategies
+
+    Each instance works on its own copy of the price data. New strategies
+    should prefer ArrayStrategy, which shares the data without copying;
+    Backtester runs TradingStrategy subclasses through LegacyStrategyAdapter.
+    """
 
     def __init__(self, data, params=None):
         """
@@ -10,9 +20,25 @@ class TradingStrategy:
             params (dict, optional): Strategy parameters
         """
         self.data = data.copy()
+        # Compute on float64 even when the data was loaded in compact mode
+        for col in self.data.columns[self.data.dtypes == np.float32]:
+            self.data[col] = widen_prices(self.data[col].to_numpy())
         self.params = params or {}
         self.signals = None
 
+    @classmethod
+    def valid_params(cls, params):
+        """
+        Check whether a parameter set is meaningful for the strategy.
+        
+        Args:
+            params (dict): Strategy parameters
+        
+        Returns:
+            bool: True if the parameters can be used
+        """
+        return True
+
     def generate_signals(self):
         """
         Generate trading signals. Must be implemented by subclasses.
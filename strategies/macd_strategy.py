@@ -1,40 +1,99 @@
-from strategies.base_strategy import TradingStrategy
+import numpy as np
+import pandas as pd
 
-class MACDStrategy(TradingStrategy):
+from strategies.array_strategy import ArrayStrategy
+
+
+def _ewm(values, span, last=None):
+    """
+    Exponential moving average (adjust=False), optionally continuing from a previous value.
+
+    With adjust=False each value is (1 - alpha) * previous + alpha * current, so
+    seeding the series with the previous average continues the recursion.
+    """
+    if last is None:
+        return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+    seeded = np.concatenate([[last], values])
+    return pd.Series(seeded).ewm(span=span, adjust=False).mean().to_numpy()[1:]
+
+
+class MACDStrategy(ArrayStrategy):
     """MACD Strategy: Buy when MACD line crosses above signal line, sell when it crosses below"""
 
-    def generate_signals(self):
+    @classmethod
+    def valid_params(cls, params):
+        """
+        Check that the fast period is shorter than the slow period.
+
+        Args:
+            params (dict): Strategy parameters
+
+        Returns:
+            bool: True if the parameters can be used
+        """
+        return params.get('fast_period', 4) < params.get('slow_period', 8)
+
+    def compute(self, columns):
         """
         Generate trading signals based on MACD indicator.
         
         Buy signals are generated when the MACD line crosses above the signal line.
         Sell signals are generated when the MACD line crosses below the signal line.
         
+        Args:
+            columns (dict): Read-only column arrays, must contain '收盘'
+
+        Returns:
+            tuple: (signals, indicators) with signals -1 for sell, 0 for hold, 1 for buy
+                and the 'MACD_line'/'signal_line'/'MACD_histogram' indicator arrays
+        """
+        signals, indicators, _ = self.resume(columns, None)
+        return signals, indicators
+
+    def resume(self, columns, state):
+        """
+        Generate MACD signals continuing from a checkpoint.
+        
+        The state keeps the last fast/slow/signal EMA values and MACD line value.
+        
+        Args:
+            columns (dict): Read-only column arrays of the rows after the checkpoint
+            state (dict or None): State from the previous call, None at the start of history
+
         Returns:
-            pd.Series: Trading signals (-1 for sell, 0 for hold, 1 for buy)
+            tuple: (signals, indicators, state)
         """
         # Extract parameters
         fast_period = self.params.get('fast_period', 4)
         slow_period = self.params.get('slow_period', 8)
         signal_period = self.params.get('signal_period', 2)
+        state = state or {'ema_fast': None, 'ema_slow': None, 'signal_line': None, 'MACD_line': np.nan}
 
         # Calculate MACD
-        ema_fast = self.data['收盘'].ewm(span=fast_period, adjust=False).mean()
-        ema_slow = self.data['收盘'].ewm(span=slow_period, adjust=False).mean()
+        close = columns['收盘']
+        ema_fast = _ewm(close, fast_period, state['ema_fast'])
+        ema_slow = _ewm(close, slow_period, state['ema_slow'])
         macd_line = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
+        signal_line = _ewm(macd_line, signal_period, state['signal_line'])
         histogram = macd_line - signal_line
-
-        self.data['MACD_line'] = macd_line
-        self.data['signal_line'] = signal_line
-        self.data['MACD_histogram'] = histogram
+        prev_macd = np.concatenate([[state['MACD_line']], macd_line[:-1]])
 
         # Generate signals
-        self.data['信号'] = 0
+        signals = np.zeros(len(macd_line), dtype=np.int64)
         # MACD line crosses above signal line: buy
-        self.data.loc[(macd_line > signal_line) & (macd_line.shift(1) <= signal_line), '信号'] = 1
+        signals[(macd_line > signal_line) & (prev_macd <= signal_line)] = 1
         # MACD line crosses below signal line: sell
-        self.data.loc[(macd_line < signal_line) & (macd_line.shift(1) >= signal_line), '信号'] = -1
+        signals[(macd_line < signal_line) & (prev_macd >= signal_line)] = -1
 
-        self.signals = self.data['信号']
-        return self.signals
\ No newline at end of file
+        if len(close):
+            state = {
+                'ema_fast': ema_fast[-1],
+                'ema_slow': ema_slow[-1],
+                'signal_line': signal_line[-1],
+                'MACD_line': macd_line[-1]
+            }
+        return signals, {
+            'MACD_line': macd_line,
+            'signal_line': signal_line,
+            'MACD_histogram': histogram
+        }, state
@@ -1,9 +1,25 @@
-from strategies.base_strategy import TradingStrategy
+import numpy as np
+import pandas as pd
 
-class MovingAverageStrategy(TradingStrategy):
+from strategies.array_strategy import ArrayStrategy
+
+class MovingAverageStrategy(ArrayStrategy):
     """Moving Average Strategy: Buy when short-term MA crosses above long-term MA, sell when it crosses below"""
 
-    def generate_signals(self):
+    @classmethod
+    def valid_params(cls, params):
+        """
+        Check that the short window is shorter than the long window.
+
+        Args:
+            params (dict): Strategy parameters
+
+        Returns:
+            bool: True if the parameters can be used
+        """
+        return params.get('short_window', 3) < params.get('long_window', 5)
+
+    def compute(self, columns):
         """
         Generate trading signals based on moving average crossovers.
         
@@ -12,30 +28,52 @@ class MovingAverageStrategy(TradingStrategy):
         when the short-term moving average crosses below the long-term moving average
         (death cross).
         
+        Args:
+            columns (dict): Read-only column arrays, must contain '收盘'
+
+        Returns:
+            tuple: (signals, indicators) with signals -1 for sell, 0 for hold, 1 for buy
+                and the 'short_ma'/'long_ma' indicator arrays
+        """
+        signals, indicators, _ = self.resume(columns, None)
+        return signals, indicators
+
+    def resume(self, columns, state):
+        """
+        Generate moving average crossover signals continuing from a checkpoint.
+        
+        The state keeps the closing prices of the longest window and the last trend.
+        
+        Args:
+            columns (dict): Read-only column arrays of the rows after the checkpoint
+            state (dict or None): State from the previous call, None at the start of history
+
         Returns:
-            pd.Series: Trading signals (-1 for sell, 0 for hold, 1 for buy)
+            tuple: (signals, indicators, state)
         """
         # Extract parameters
         short_window = self.params.get('short_window', 3)
         long_window = self.params.get('long_window', 5)
 
-        # Calculate moving averages (using closing prices)
-        self.data['short_ma'] = self.data['收盘'].rolling(window=short_window).mean()
-        self.data['long_ma'] = self.data['收盘'].rolling(window=long_window).mean()
-
-        # Generate signals: 1=buy, -1=sell, 0=hold
-        self.data['信号'] = 0
-        # Short MA crosses above long MA (golden cross): buy signal
-        self.data.loc[self.data['short_ma'] > self.data['long_ma'], '信号'] = 1
-        # Short MA crosses below long MA (death cross): sell signal
-        self.data.loc[self.data['short_ma'] < self.data['long_ma'], '信号'] = -1
-
-        # Remove duplicate signals (avoid consecutive signals)
-        self.data['信号'] = self.data['信号'].diff().fillna(0)
-        # Keep only 1 (buy) and -1 (sell), remove 0 (no change)
-        self.data.loc[self.data['信号'] == 2, '信号'] = 1  # 0→1 transition
-        self.data.loc[self.data['信号'] == -2, '信号'] = -1  # 0→-1 transition
-        self.data.loc[~self.data['信号'].isin([1, -1]), '信号'] = 0
-
-        self.signals = self.data['信号']
-        return self.signals
\ No newline at end of file
+        # Calculate moving averages (using closing prices), warmed up with the checkpointed closes
+        tail = state['close'] if state else np.empty(0)
+        close = np.concatenate([tail, columns['收盘']])
+        short_ma = pd.Series(close).rolling(window=short_window).mean().to_numpy()[len(tail):]
+        long_ma = pd.Series(close).rolling(window=long_window).mean().to_numpy()[len(tail):]
+
+        # Trend state: 1 when short MA is above long MA, -1 when below, 0 otherwise
+        trend = np.zeros(len(short_ma), dtype=np.int64)
+        trend[short_ma > long_ma] = 1
+        trend[short_ma < long_ma] = -1
+
+        # Keep only trend changes (avoid consecutive signals):
+        # golden cross (0/-1→1) buys, death cross (0/1→-1) sells
+        last_trend = state['trend'] if state else trend[:1]
+        change = np.diff(trend, prepend=last_trend)
+        signals = np.zeros(len(trend), dtype=np.int64)
+        signals[change > 0] = 1
+        signals[change < 0] = -1
+
+        lookback = max(short_window, long_window)
+        state = {'close': close[-lookback:].copy(), 'trend': trend[-1:] if len(trend) else last_trend}
+        return signals, {'short_ma': short_ma, 'long_ma': long_ma}, state
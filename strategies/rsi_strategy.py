@@ -1,40 +1,65 @@
-from strategies.base_strategy import TradingStrategy
+import numpy as np
+import pandas as pd
 
-class RSIStrategy(TradingStrategy):
+from strategies.array_strategy import ArrayStrategy
+
+class RSIStrategy(ArrayStrategy):
     """RSI Strategy: Buy when oversold (<30), sell when overbought (>70)"""
 
-    def generate_signals(self):
+    def compute(self, columns):
         """
         Generate trading signals based on RSI indicator.
         
         Buy signals are generated when the RSI crosses below the oversold level (default 30).
         Sell signals are generated when the RSI crosses above the overbought level (default 70).
         
+        Args:
+            columns (dict): Read-only column arrays, must contain '收盘'
+
+        Returns:
+            tuple: (signals, indicators) with signals -1 for sell, 0 for hold, 1 for buy
+                and the 'RSI' indicator array
+        """
+        signals, indicators, _ = self.resume(columns, None)
+        return signals, indicators
+
+    def resume(self, columns, state):
+        """
+        Generate RSI signals continuing from a checkpoint.
+        
+        The state keeps the closing prices of the last RSI period and the last RSI.
+        
+        Args:
+            columns (dict): Read-only column arrays of the rows after the checkpoint
+            state (dict or None): State from the previous call, None at the start of history
+
         Returns:
-            pd.Series: Trading signals (-1 for sell, 0 for hold, 1 for buy)
+            tuple: (signals, indicators, state)
         """
         # Extract parameters
         period = self.params.get('period', 6)
         overbought = self.params.get('overbought_level', 70)
         oversold = self.params.get('oversold_level', 30)
 
-        # Calculate RSI
-        delta = self.data['收盘'].diff()
+        # Calculate RSI, warmed up with the checkpointed closes
+        tail = state['close'] if state else np.empty(0)
+        close = np.concatenate([tail, columns['收盘']])
+        delta = pd.Series(close).diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
 
         # Avoid division by zero
         rs = gain / loss.where(loss != 0, 1e-10)
-        rsi = 100 - (100 / (1 + rs))
-
-        self.data['RSI'] = rsi
+        rsi = (100 - (100 / (1 + rs))).to_numpy()[len(tail):]
+        last_rsi = state['rsi'] if state else np.nan
+        prev_rsi = np.concatenate([[last_rsi], rsi[:-1]])
 
         # Generate signals
-        self.data['信号'] = 0
+        signals = np.zeros(len(rsi), dtype=np.int64)
         # Buy when oversold
-        self.data.loc[(self.data['RSI'] < oversold) & (self.data['RSI'].shift(1) >= oversold), '信号'] = 1
+        signals[(rsi < oversold) & (prev_rsi >= oversold)] = 1
         # Sell when overbought
-        self.data.loc[(self.data['RSI'] > overbought) & (self.data['RSI'].shift(1) <= overbought), '信号'] = -1
+        signals[(rsi > overbought) & (prev_rsi <= overbought)] = -1
 
-        self.signals = self.data['信号']
-        return self.signals
\ No newline at end of file
+        state = {'close': close[-period:].copy(), 'rsi': rsi[-1] if len(rsi) else last_rsi}
+        return signals, {'RSI': rsi}, state
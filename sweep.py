@@ -0,0 +1,416 @@
+import argparse
+import glob
+import importlib
+import json
+import os
+import socket
+import sqlite3
+import time
+import traceback
+from multiprocessing import Process
+
+import yaml
+
+import strategies
+from backtester import Backtester
+from data_loader import DataLoader
+from walk_forward import expand_param_grid
+
+# Strategies swept by default and the walk_forward.param_grid key of their grid
+SWEEP_STRATEGIES = {
+    'MovingAverageStrategy': 'moving_average',
+    'RSIStrategy': 'rsi',
+    'MACDStrategy': 'macd'
+}
+
+
+class WorkQueue:
+    """Base class for sweep work queues shared by workers on one or more nodes."""
+
+    @classmethod
+    def from_config(cls, settings):
+        """
+        Create the queue from the sweep section of config.yaml.
+
+        Args:
+            settings (dict): Sweep settings
+
+        Returns:
+            WorkQueue: Queue connected to its backend
+        """
+        raise NotImplementedError("Subclasses must implement the from_config method")
+
+    def put(self, units):
+        """
+        Add work units, skipping units that are already queued.
+
+        Args:
+            units (list): Dicts with 'symbol', 'strategy' and 'params' keys
+
+        Returns:
+            int: Number of units added
+        """
+        raise NotImplementedError("Subclasses must implement the put method")
+
+    def claim(self, worker):
+        """
+        Claim the next pending work unit.
+
+        Args:
+            worker (str): Identifier of the claiming worker
+
+        Returns:
+            dict or None: Work unit with an 'id' key, None if nothing is pending
+        """
+        raise NotImplementedError("Subclasses must implement the claim method")
+
+    def complete(self, unit_id, worker, metrics):
+        """
+        Store the metrics of a finished work unit.
+
+        Args:
+            unit_id (int): Claimed work unit
+            worker (str): Identifier of the worker holding the claim
+            metrics (dict): Backtesting metrics from get_metrics
+
+        Returns:
+            bool: False if the worker no longer holds the claim and the result was ignored
+        """
+        raise NotImplementedError("Subclasses must implement the complete method")
+
+    def fail(self, unit_id, worker, error):
+        """
+        Record a failed attempt, requeueing the unit while it has attempts left.
+
+        Args:
+            unit_id (int): Claimed work unit
+            worker (str): Identifier of the worker holding the claim
+            error (str): Error description
+
+        Returns:
+            bool: False if the worker no longer holds the claim and the failure was ignored
+        """
+        raise NotImplementedError("Subclasses must implement the fail method")
+
+    def progress(self):
+        """
+        Count work units by status.
+
+        Returns:
+            dict: Status ('pending', 'running', 'done', 'failed') to unit count
+        """
+        raise NotImplementedError("Subclasses must implement the progress method")
+
+    def results(self):
+        """
+        Get the metrics of all finished work units.
+
+        Returns:
+            list: Dicts with 'symbol', 'strategy', 'params' and 'metrics' keys
+        """
+        raise NotImplementedError("Subclasses must implement the results method")
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """Work queue and result store in a SQLite database file.
+
+    Meant for workers on one machine. Workers on other nodes can open the
+    file over shared storage only if the filesystem implements file locks
+    correctly, which SQLite warns many network filesystems do not; use a
+    server-based backend for multi-node sweeps.
+    """
+
+    def __init__(self, path, max_attempts=3, lease_seconds=600):
+        """
+        Initialize the SQLiteWorkQueue, creating the tables if needed.
+
+        Args:
+            path (str): Database file
+            max_attempts (int): Attempts before a unit is marked failed
+            lease_seconds (float): Time after which a running unit whose worker
+                stopped responding is handed out again
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS units (
+                id INTEGER PRIMARY KEY,
+                symbol TEXT NOT NULL,
+                strategy TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                error TEXT,
+                metrics TEXT,
+                UNIQUE (symbol, strategy, params)
+            );
+            CREATE INDEX IF NOT EXISTS units_status ON units (status);
+        ''')
+
+    @classmethod
+    def from_config(cls, settings):
+        return cls(settings.get('database', 'sweep.db'), settings.get('max_attempts', 3),
+                   settings.get('lease_seconds', 600))
+
+    def put(self, units):
+        rows = [(u['symbol'], u['strategy'], json.dumps(u['params'], sort_keys=True)) for u in units]
+        before = self.connection.total_changes
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO units (symbol, strategy, params) VALUES (?, ?, ?)', rows)
+        return self.connection.total_changes - before
+
+    def claim(self, worker):
+        now = time.time()
+        # BEGIN IMMEDIATE takes the write lock so two workers cannot claim the same unit
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Expired units without attempts left are failed instead of handed out again
+            self.connection.execute(
+                "UPDATE units SET status = 'failed', error = ? "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (f"Lease expired after {self.max_attempts} attempts", now, self.max_attempts))
+            row = self.connection.execute(
+                "SELECT id, symbol, strategy, params, attempts FROM units "
+                "WHERE status = 'pending' OR (status = 'running' AND lease_until < ? AND attempts < ?) "
+                "ORDER BY id LIMIT 1", (now, self.max_attempts)).fetchone()
+            if row is not None:
+                self.connection.execute(
+                    "UPDATE units SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ? "
+                    "WHERE id = ?", (worker, now + self.lease_seconds, row[0]))
+            self.connection.execute('COMMIT')
+        except Exception:
+            self.connection.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        return {'id': row[0], 'symbol': row[1], 'strategy': row[2], 'params': json.loads(row[3]),
+                'attempt': row[4] + 1}
+
+    def complete(self, unit_id, worker, metrics):
+        # Only the worker holding the claim may finish the unit, a worker whose
+        # lease expired must not overwrite the result of the worker that took over
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE units SET status = 'done', metrics = ?, error = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(metrics, ensure_ascii=False), unit_id, worker))
+        return cursor.rowcount > 0
+
+    def fail(self, unit_id, worker, error):
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (self.max_attempts, error, unit_id, worker))
+        return cursor.rowcount > 0
+
+    def progress(self):
+        counts = {'pending': 0, 'running': 0, 'done': 0, 'failed': 0}
+        counts.update(self.connection.execute('SELECT status, COUNT(*) FROM units GROUP BY status').fetchall())
+        return counts
+
+    def results(self):
+        rows = self.connection.execute(
+            "SELECT symbol, strategy, params, metrics FROM units WHERE status = 'done' ORDER BY id").fetchall()
+        return [{'symbol': symbol, 'strategy': strategy, 'params': json.loads(params), 'metrics': json.loads(metrics)}
+                for symbol, strategy, params, metrics in rows]
+
+
+# Queue backends selectable by name with the sweep.backend setting
+QUEUE_BACKENDS = {
+    'sqlite': SQLiteWorkQueue
+}
+
+
+def create_queue(settings):
+    """
+    Create the work queue selected by the sweep.backend setting.
+
+    Args:
+        settings (dict): Sweep settings; 'backend' is a QUEUE_BACKENDS name or the
+            dotted path of a WorkQueue subclass (e.g. 'my_queues.RedisWorkQueue'),
+            defaults to 'sqlite'
+
+    Returns:
+        WorkQueue: Queue created with the backend's from_config
+
+    Raises:
+        Exception: If the backend is unknown or not a WorkQueue subclass
+    """
+    backend = settings.get('backend', 'sqlite')
+    if backend in QUEUE_BACKENDS:
+        queue_class = QUEUE_BACKENDS[backend]
+    elif '.' in backend:
+        module, name = backend.rsplit('.', 1)
+        queue_class = getattr(importlib.import_module(module), name)
+    else:
+        raise Exception(f"Unknown queue backend {backend}, expected one of {list(QUEUE_BACKENDS)} "
+                        f"or the dotted path of a WorkQueue subclass")
+    if not (isinstance(queue_class, type) and issubclass(queue_class, WorkQueue)):
+        raise Exception(f"Queue backend {backend} is not a WorkQueue subclass")
+    return queue_class.from_config(settings)
+
+
+def build_units(data_dir, strategy_grids):
+    """
+    Build one work unit per symbol, strategy and parameter combination.
+
+    Combinations rejected by the strategy's valid_params are skipped.
+
+    Args:
+        data_dir (str): Directory with one <symbol>.csv file per symbol
+        strategy_grids (dict): Strategy class name to parameter grid
+
+    Returns:
+        list: Dicts with 'symbol', 'strategy' and 'params' keys
+    """
+    symbols = sorted(os.path.splitext(os.path.basename(path))[0]
+                     for path in glob.glob(os.path.join(data_dir, '*.csv')))
+    return [
+        {'symbol': symbol, 'strategy': strategy, 'params': params}
+        for symbol in symbols
+        for strategy, grid in strategy_grids.items()
+        for params in expand_param_grid(grid)
+        if getattr(strategies, strategy).valid_params(params)
+    ]
+
+
+class Worker:
+    """Worker pulling work units from a queue and backtesting them."""
+
+    def __init__(self, queue, data_dir='stock_data', initial_capital=100000, name=None, poll_seconds=5):
+        """
+        Initialize the Worker.
+
+        Args:
+            queue (WorkQueue): Queue to pull work units from
+            data_dir (str): Directory with one <symbol>.csv file per symbol
+            initial_capital (float): Initial capital for backtesting
+            name (str, optional): Worker identifier, defaults to host name and process id
+            poll_seconds (float): Wait between claims while other workers still run units
+        """
+        self.queue = queue
+        self.data_dir = data_dir
+        self.initial_capital = initial_capital
+        self.poll_seconds = poll_seconds
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.data = {}  # Loaded price data per symbol, reused across work units
+
+    def run_unit(self, unit):
+        """
+        Backtest a single work unit.
+
+        Args:
+            unit (dict): Work unit with 'symbol', 'strategy' and 'params' keys
+
+        Returns:
+            dict: Backtesting metrics
+        """
+        if unit['symbol'] not in self.data:
+            loader = DataLoader(data_file=os.path.join(self.data_dir, f"{unit['symbol']}.csv"))
+            self.data[unit['symbol']] = loader.get_data()
+        data = self.data[unit['symbol']]
+
+        strategy = getattr(strategies, unit['strategy'])(data, params=unit['params'])
+        backtester = Backtester(data, strategy, self.initial_capital, verbose=False)
+        backtester.run()
+        # Cast NumPy scalars so the metrics can be stored as JSON
+        return {key: value.item() if hasattr(value, 'item') else value
+                for key, value in backtester.get_metrics().items()}
+
+    def run(self):
+        """
+        Process work units until none are pending or running.
+
+        While other workers still hold running units the worker keeps polling,
+        so units of a worker that died are retried once their lease expires.
+
+        Returns:
+            int: Number of work units completed by this worker
+        """
+        completed = 0
+        while True:
+            unit = self.queue.claim(self.name)
+            if unit is None:
+                if self.queue.progress()['running'] == 0:
+                    return completed
+                time.sleep(self.poll_seconds)
+                continue
+            try:
+                metrics = self.run_unit(unit)
+            except Exception:
+                self.queue.fail(unit['id'], self.name, traceback.format_exc())
+                print(f"{self.name}: {unit['symbol']} {unit['strategy']} {unit['params']} "
+                      f"failed (attempt {unit['attempt']})")
+            else:
+                if self.queue.complete(unit['id'], self.name, metrics):
+                    completed += 1
+                else:
+                    print(f"{self.name}: {unit['symbol']} {unit['strategy']} {unit['params']} "
+                          f"lease expired, result discarded")
+
+
+def _run_worker(settings, initial_capital):
+    """Entry point of a local worker process."""
+    queue = create_queue(settings)
+    Worker(queue, settings.get('data_dir', 'stock_data'), initial_capital,
+           poll_seconds=settings.get('poll_seconds', 5)).run()
+
+
+def run_local_workers(settings, n_workers, initial_capital=100000):
+    """
+    Run worker processes on this node until the queue is drained.
+
+    Each process connects to the queue selected by the settings itself.
+
+    Args:
+        settings (dict): Sweep settings with the queue backend, data_dir and poll_seconds
+        n_workers (int): Number of worker processes
+        initial_capital (float): Initial capital for backtesting
+    """
+    workers = [Process(target=_run_worker, args=(settings, initial_capital)) for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def main():
+    """
+    Command line entry point: enqueue a sweep, run workers or show progress.
+    """
+    with open('config.yaml', 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    sweep = dict(config.get('sweep', {}))
+    param_grids = config.get('walk_forward', {}).get('param_grid', {})
+
+    parser = argparse.ArgumentParser(description='Distributed parameter sweep over all symbols')
+    parser.add_argument('command', choices=['enqueue', 'work', 'status', 'results'])
+    parser.add_argument('--database', default=sweep.get('database', 'sweep.db'),
+                        help='Database file of the sqlite backend')
+    parser.add_argument('--workers', type=int, default=sweep.get('workers', os.cpu_count()))
+    args = parser.parse_args()
+
+    sweep['database'] = args.database
+    queue = create_queue(sweep)
+
+    if args.command == 'enqueue':
+        grids = {name: param_grids.get(key, config['strategies'][key]) for name, key in SWEEP_STRATEGIES.items()}
+        added = queue.put(build_units(sweep.get('data_dir', 'stock_data'), grids))
+        print(f"Added {added} work units")
+    elif args.command == 'work':
+        run_local_workers(sweep, args.workers, config.get('initial_capital', 100000))
+    elif args.command == 'results':
+        for result in queue.results():
+            print(result['symbol'], result['strategy'], result['params'],
+                  f"Total return: {result['metrics']['总收益率(%)']}%")
+    print(f"Progress: {queue.progress()}")
+
+
+if __name__ == "__main__":
+    main()
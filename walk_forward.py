@@ -0,0 +1,271 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from backtester import Backtester, calculate_metrics
+from data_loader import DataLoader
+from strategies import MACDStrategy, MovingAverageStrategy, RSIStrategy
+from strategies.array_strategy import ArrayStrategy, column_arrays
+from visualizer import Visualizer
+
+
+class SignalStrategy(ArrayStrategy):
+    """Strategy replaying precomputed signals"""
+
+    columns = ()
+
+    def __init__(self, signals):
+        """
+        Initialize the strategy.
+
+        Args:
+            signals (np.ndarray): Signals aligned with the data being backtested
+        """
+        super().__init__()
+        self.signals = signals
+
+    def compute(self, columns):
+        """
+        Return the precomputed signals.
+
+        Args:
+            columns (dict): Unused
+
+        Returns:
+            tuple: (signals, indicators) with indicators left empty
+        """
+        return self.signals, {}
+
+
+def expand_param_grid(param_grid):
+    """
+    Expand a parameter grid into every parameter combination.
+
+    Args:
+        param_grid (dict): Parameter name to a list of candidate values
+            (a single value is treated as a one-element list)
+
+    Returns:
+        list: Parameter dicts, one per combination
+    """
+    names = list(param_grid)
+    values = [v if isinstance(v, list) else [v] for v in param_grid.values()]
+    return [dict(zip(names, combination)) for combination in product(*values)]
+
+
+# Price data of a worker process, sent once by _init_worker instead of with every parameter set
+_worker_data = None
+
+
+def _init_worker(data):
+    """Store the price data in a worker process of the parameter search."""
+    global _worker_data
+    _worker_data = data
+
+
+def _score_params(params, strategy_class, windows, initial_capital, score, data=None):
+    """
+    Compute signals for one parameter set and score them on every in-sample window.
+
+    Indicators only look back, so signals are computed once over the full
+    history and sliced per window instead of recomputed for each window.
+    In worker processes the data comes from _init_worker.
+
+    Returns:
+        tuple: (signals, scores) with one score per window
+    """
+    if data is None:
+        data = _worker_data
+    strategy = strategy_class(data, params)
+    signals, _ = strategy.compute(column_arrays(data, strategy.columns))
+
+    scores = []
+    for start, split, _ in windows:
+        backtester = Backtester(data.iloc[start:split], SignalStrategy(signals[start:split]),
+                                initial_capital, verbose=False)
+        backtester.run()
+        scores.append(backtester.get_metrics()[score])
+    return signals, scores
+
+
+class WalkForwardOptimizer:
+    """Walk-forward parameter optimization with out-of-sample evaluation."""
+
+    def __init__(self, data, strategy_class, param_grid, in_sample=250, out_of_sample=60,
+                 initial_capital=100000, score='总收益率(%)', n_jobs=None):
+        """
+        Initialize the WalkForwardOptimizer.
+
+        Args:
+            data (pd.DataFrame): Historical price data
+            strategy_class (type): ArrayStrategy subclass to optimize
+            param_grid (dict): Parameter name to a list of candidate values,
+                combinations rejected by strategy_class.valid_params are skipped
+            in_sample (int): Number of bars each parameter search is run on
+            out_of_sample (int): Number of bars the chosen parameters are traded on,
+                also the step between consecutive windows
+            initial_capital (float): Initial capital for backtesting
+            score (str): get_metrics key maximized on the in-sample windows
+            n_jobs (int, optional): Worker processes for the parameter search,
+                defaults to the number of CPUs; 1 runs in the current process
+
+        Raises:
+            Exception: If the strategy class is not an ArrayStrategy, the data
+                is shorter than one window or the grid has no valid parameters
+        """
+        if not issubclass(strategy_class, ArrayStrategy):
+            raise Exception("Walk-forward optimization requires an ArrayStrategy subclass")
+        if len(data) <= in_sample:
+            raise Exception(f"Need more than {in_sample} bars for walk-forward optimization, got {len(data)}")
+
+        self.data = data
+        self.strategy_class = strategy_class
+        self.param_sets = [params for params in expand_param_grid(param_grid) if strategy_class.valid_params(params)]
+        if not self.param_sets:
+            raise Exception(f"No valid parameter combination in the grid for {strategy_class.__name__}")
+        self.in_sample = in_sample
+        self.out_of_sample = out_of_sample
+        self.initial_capital = initial_capital
+        self.score = score
+        self.n_jobs = n_jobs
+        self.windows = None
+        self.results = None
+
+    def split(self):
+        """
+        Split the history into rolling in-sample/out-of-sample windows.
+
+        Returns:
+            list: (start, split, end) row positions; rows [start, split) are in-sample
+                and [split, end) out-of-sample. The last out-of-sample window may be shorter
+        """
+        windows = []
+        start = 0
+        while start + self.in_sample < len(self.data):
+            split = start + self.in_sample
+            windows.append((start, split, min(split + self.out_of_sample, len(self.data))))
+            start += self.out_of_sample
+        return windows
+
+    def run(self):
+        """
+        Execute the walk-forward optimization.
+
+        Each parameter set is scored on all in-sample windows in parallel. The best
+        parameters of each window are then traded on the following out-of-sample
+        window, starting flat with the capital the previous window ended with.
+
+        Returns:
+            pd.DataFrame: Stitched out-of-sample backtesting results
+        """
+        windows = self.split()
+        score_params = partial(_score_params, strategy_class=self.strategy_class, windows=windows,
+                               initial_capital=self.initial_capital, score=self.score)
+        if self.n_jobs == 1:
+            scored = list(map(partial(score_params, data=self.data), self.param_sets))
+        else:
+            # Send the data once per worker process rather than with every parameter set
+            with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                     initargs=(self.data,)) as executor:
+                scored = list(executor.map(score_params, self.param_sets))
+
+        signals = [s for s, _ in scored]
+        scores = np.array([window_scores for _, window_scores in scored])
+
+        self.windows = []
+        segments = []
+        capital = self.initial_capital
+        for w, (start, split, end) in enumerate(windows):
+            best = int(np.argmax(scores[:, w]))
+            backtester = Backtester(self.data.iloc[split:end], SignalStrategy(signals[best][split:end]),
+                                    capital, verbose=False)
+            segment = backtester.run()
+            self.windows.append({
+                'in_sample_start': self.data.index[start],
+                'out_of_sample_start': self.data.index[split],
+                'out_of_sample_end': self.data.index[end - 1],
+                'params': self.param_sets[best],
+                'in_sample_score': scores[best, w],
+                'out_of_sample_score': backtester.get_metrics()[self.score]
+            })
+            segments.append(segment)
+            capital = segment['资产价值'].iloc[-1]
+
+        self.results = pd.concat(segments)
+        return self.results
+
+    def get_windows(self):
+        """
+        Get the parameters chosen for each window and their scores.
+
+        Returns:
+            pd.DataFrame: One row per window
+
+        Raises:
+            Exception: If the optimization has not been run yet
+        """
+        if self.windows is None:
+            raise Exception("Please run walk-forward optimization first (run method)")
+        return pd.DataFrame(self.windows)
+
+    def get_metrics(self):
+        """
+        Calculate metrics of the stitched out-of-sample results.
+
+        Returns:
+            dict: Dictionary containing various backtesting metrics
+
+        Raises:
+            Exception: If the optimization has not been run yet
+        """
+        if self.results is None:
+            raise Exception("Please run walk-forward optimization first (run method)")
+        return calculate_metrics(self.results, self.initial_capital)
+
+
+def main():
+    """
+    Run walk-forward optimization for the technical indicator strategies.
+    """
+    with open('config.yaml', 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    initial_capital = config.get('initial_capital', 100000)
+    walk_forward = config.get('walk_forward', {})
+    param_grids = walk_forward.get('param_grid', {})
+
+    data = DataLoader().get_data()
+
+    strategies = {
+        'Moving Average Strategy': (MovingAverageStrategy, 'moving_average'),
+        'RSI Strategy': (RSIStrategy, 'rsi'),
+        'MACD Strategy': (MACDStrategy, 'macd')
+    }
+
+    results = {}
+    for name, (strategy_class, key) in strategies.items():
+        print(f"Optimizing {name}...")
+        optimizer = WalkForwardOptimizer(
+            data,
+            strategy_class,
+            param_grids.get(key, config['strategies'][key]),
+            in_sample=walk_forward.get('in_sample', 250),
+            out_of_sample=walk_forward.get('out_of_sample', 60),
+            initial_capital=initial_capital,
+            score=walk_forward.get('score', '总收益率(%)'),
+            n_jobs=walk_forward.get('n_jobs')
+        )
+        results[name] = optimizer.run()
+        print(optimizer.get_windows().to_string())
+        print(f"{name} out-of-sample total return: {optimizer.get_metrics()['总收益率(%)']}%")
+
+    visualizer = Visualizer()
+    visualizer.plot_strategies_comparison(results)
+
+
+if __name__ == "__main__":
+    main()